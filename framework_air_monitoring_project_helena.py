@@ -16,21 +16,37 @@ but the code is ready to read lines from an Arduino if connected later.
 WHAT THIS CODE DOES (FUNCTIONALITY)
 ---------------------------------------------------------------------
 1) Opens a serial port (if available) to read air-quality values printed
-   by an Arduino/ESP32. Expected line format:
+   by an Arduino/ESP32. Expected line format (the firmware protocol):
      PM25:23.4;PM10:45.1;CO2:780;TEMP:21.9;HUM:47.3
+   Keys are UPPERCASE, fields are separated by ";" and there are no spaces.
+   Set STRICT = False to also accept hand-typed or older formats.
 2) If no device is available, it switches to SIMULATION mode and generates
    realistic random data so the script always runs.
 3) Checks values against simple guideline thresholds and prints warnings.
-4) Saves every reading to a CSV file (air_quality_log.csv) for later analysis.
+4) Saves every reading to a CSV file (air_quality_log.csv, or a compressed
+   air_quality_log.csv.gz with COMPRESS_CSV) for later analysis.
 
 ---------------------------------------------------------------------
 LIBRARIES USED (and why)
 ---------------------------------------------------------------------
-- serial (pyserial): reads text lines from the USB/COM port (Arduino → PC).
-- csv: writes logs to a CSV file so anyone can open it in Excel or R.
+- serial (pyserial): reads lines from the USB/COM port (Arduino → PC). They
+  stay raw bytes all the way through parsing; no text decoding is needed.
+- gzip: optionally compresses the CSV log (much less writing to an SD card).
+- mmap: reads large log files without copying them into memory first.
+- os: checks whether the log file already exists and writes CSV rows (that
+  anyone can open in Excel or R) to it in large blocks directly.
+- re: finds the KEY:value pairs in each serial line in a single pass.
+- sys: prints each reading to the screen with a single write.
 - time: timing between reads and small waits (e.g., after opening serial).
 - random: creates fake data in SIMULATION mode (useful for demos).
 - datetime: timestamps each reading for history and plots later.
+- numpy (optional): simulates and checks many readings at once, e.g. many
+  virtual sensors or a replayed CSV log.
+- numba (optional): compiles the many-sensor simulation to machine code.
+- pyarrow (optional): saves readings as a compact Parquet file that pandas
+  or R can load much faster than CSV.
+- influxdb-client / psycopg (optional): send readings to InfluxDB or
+  TimescaleDB in batches.
 
 ---------------------------------------------------------------------
 FUTURE IMPROVEMENTS (how to make it better)
@@ -50,22 +66,47 @@ The core idea is to keep barriers low, learn step by step, and scale later.
 """
 
 # ---------------------------- IMPORTS ---------------------------------
-import csv
+import gzip
+import mmap
+import os
+import re
+import sys
 import time
 import random
+import zlib
+from collections import deque, namedtuple
 from datetime import datetime
 
-try:
-    import serial  # pyserial; install with: pip install pyserial
-except Exception:
-    serial = None  # If not installed, we still can run in SIMULATION mode.
-
 # ------------------------- USER SETTINGS ------------------------------
 SIMULATION = True             # False → try to read from Arduino serial port
 SERIAL_PORT = "COM3"          # macOS example: "/dev/tty.usbserial-1410"
 BAUD_RATE = 9600
+STRICT = True                 # False → also accept lowercase keys and spaces
 READ_INTERVAL_SEC = 1.0
 CSV_PATH = "air_quality_log.csv"
+CSV_HEADER = ["timestamp", "PM2_5", "PM10", "CO2", "TEMP_C", "HUM_%"]
+CSV_FLUSH_EVERY = 60          # rows kept in memory before writing to disk
+CSV_FSYNC_EVERY = 600         # rows written before forcing them onto the disk
+COMPRESS_CSV = False          # True → write a gzip-compressed log (.csv.gz)
+# Each flush of a compressed log is its own small gzip file inside the .gz,
+# so a crash or power cut loses at most CSV_FLUSH_EVERY rows. The price is a
+# weaker ratio: about 3x smaller with 60 rows per flush, about 4x with 3600
+# (measured on simulated data). Raise CSV_FLUSH_EVERY for smaller files.
+CSV_LOG_PATH = CSV_PATH + ".gz" if COMPRESS_CSV else CSV_PATH
+VERBOSE = True                # False → print only warnings, not every reading
+PARQUET_LOG = False           # True → also save a Parquet file (needs pyarrow)
+PARQUET_BATCH = 256           # rows collected before writing a Parquet chunk
+
+# Optional time-series database (see "FUTURE IMPROVEMENTS" above)
+TSDB_BACKEND = None           # "influx" or "timescale" → also send readings there
+TSDB_BATCH = 200              # rows collected before one bulk write
+TSDB_FLUSH_SEC = 10.0         # ...or write whatever is collected after this long
+TSDB_MAX_BACKLOG = 10000      # rows kept while the database is unreachable
+INFLUX_URL = "http://localhost:8086"
+INFLUX_TOKEN = ""
+INFLUX_ORG = "prague"
+INFLUX_BUCKET = "air_quality"
+TIMESCALE_DSN = "postgresql://localhost/air_quality"
 
 # Simple, educational thresholds (WHO/EU style, simplified)
 PM25_MAX = 25.0   # μg/m³ (daily guideline)
@@ -76,54 +117,202 @@ TEMP_MAX  = 45.0  # °C
 HUM_MIN   = 20.0  # %
 HUM_MAX   = 70.0  # %
 
+PM25_WARNING = "Warning: PM2.5 exceeds guideline level."
+PM10_WARNING = "Warning: PM10 exceeds guideline level."
+CO2_WARNING  = "Warning: CO₂ is high (ventilation recommended)."
+TEMP_WARNING = "Warning: Temperature outside plausible range."
+HUM_WARNING  = "Warning: Humidity outside comfort range."
+
+# The same checks as a table, for checking many readings at once:
+# (Reading field, lowest allowed, highest allowed, warning).
+# Pollutants only have an upper limit, so their lower bound is -inf.
+NO_LIMIT = float("inf")
+THRESHOLDS = (
+    ("pm25", -NO_LIMIT, PM25_MAX, PM25_WARNING),
+    ("pm10", -NO_LIMIT, PM10_MAX, PM10_WARNING),
+    ("co2",  -NO_LIMIT, CO2_MAX,  CO2_WARNING),
+    ("temp", TEMP_MIN,  TEMP_MAX, TEMP_WARNING),
+    ("hum",  HUM_MIN,   HUM_MAX,  HUM_WARNING),
+)
+
 # ----------------------- HELPER FUNCTIONS -----------------------------
+# One reading: when it was taken plus the five measured values. A tuple
+# with names is lighter than a dict and is written to CSV as it is.
+Reading = namedtuple("Reading", "timestamp pm25 pm10 co2 temp hum")
+
+def open_log_fd(path: str) -> int:
+    """Open a CSV log for appending raw bytes; returns the file descriptor."""
+    flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT
+    flags |= getattr(os, "O_BINARY", 0)  # Windows: don't turn \n into \r\n
+    return os.open(path, flags, 0o644)
+
+def write_log_block(fd: int, data, compress: bool) -> None:
+    """Append a block of CSV lines to a log opened with open_log_fd().
+
+    For a .gz log the block becomes one complete gzip member, so everything
+    written before a crash or power cut can still be read back.
+    """
+    if compress:
+        data = gzip.compress(data, compresslevel=3)  # fast level: little CPU
+    written = 0
+    with memoryview(data) as view:
+        while written < len(view):  # os.write may write only part
+            written += os.write(fd, view[written:])
+
 def ensure_csv_header(path: str) -> None:
-    """Create CSV with header if it doesn't exist."""
+    """Create CSV with header if it doesn't exist (or is empty).
+
+    A non-empty file already has the header, because the header is always
+    the first thing written. Checking the size avoids reading the file.
+    """
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        return
+    fd = open_log_fd(path)
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            if f.readline().startswith("timestamp"):
-                return
-    except FileNotFoundError:
-        pass
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["timestamp", "PM2_5", "PM10", "CO2", "TEMP_C", "HUM_%"])
-
-def parse_line(line: str) -> dict:
-    """Parse Arduino text line into a dictionary with floats."""
+        header = (",".join(CSV_HEADER) + "\r\n").encode("ascii")
+        write_log_block(fd, header, path.endswith(".gz"))
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+_last_sec = -1
+_last_iso = ""
+
+def now_iso() -> str:
+    """Current local time as an ISO string, e.g. 2025-01-01T12:00:00.
+
+    The text only changes once per second, so it is formatted at most once
+    per second and reused for any other readings in the same second.
+    """
+    global _last_sec, _last_iso
+    sec = int(time.time())
+    if sec != _last_sec:
+        _last_sec = sec
+        _last_iso = datetime.fromtimestamp(sec).isoformat(timespec="seconds")
+    return _last_iso
+
+# Tolerant mode: matches one "KEY:value" pair, e.g. b"PM25:23.4" or b"temp : -3".
+# The whole value is captured and left to float(), so "1e3" or ".5" work too.
+LINE_RE = re.compile(rb"([A-Za-z0-9_.]+)\s*:\s*([^;\s]+)")
+
+# Names the Arduino may send → Reading field names.
+KEY_MAP = {
+    b"PM25": "pm25", b"PM2.5": "pm25", b"PM2_5": "pm25",
+    b"PM10": "pm10",
+    b"CO2": "co2",
+    b"TEMP": "temp", b"TEMPC": "temp", b"T": "temp",
+    b"HUM": "hum", b"RH": "hum",
+}
+
+def parse_line(raw: bytes):
+    """Parse a raw Arduino line (bytes) into a Reading.
+
+    With STRICT the line must follow the firmware protocol exactly, so it is
+    split directly without cleaning up case or spaces first. Returns None if
+    the line does not contain all five values.
+    """
     data = {}
-    for part in line.strip().split(";"):
-        if not part or ":" not in part:
-            continue
-        key, val = part.split(":", 1)
-        key = key.strip().upper()
-        val = float(val.strip())
-        if key in ("PM25", "PM2.5", "PM2_5"):
-            data["PM2_5"] = val
-        elif key == "PM10":
-            data["PM10"] = val
-        elif key == "CO2":
-            data["CO2"] = val
-        elif key in ("TEMP", "TEMPC", "T"):
-            data["TEMP"] = val
-        elif key in ("HUM", "RH"):
-            data["HUM"] = val
-    return data
-
-def simulate_reading() -> dict:
-    """Generate realistic random readings when no Arduino is connected."""
-    return {
-        "PM2_5": round(random.uniform(5, 80), 1),
-        "PM10":  round(random.uniform(10, 120), 1),
-        "CO2":   round(random.uniform(400, 2000), 0),
-        "TEMP":  round(random.uniform(0, 35), 1),
-        "HUM":   round(random.uniform(25, 75), 1),
-    }
+    if STRICT:
+        try:
+            for part in raw.split(b";"):
+                key, _, val = part.partition(b":")
+                name = KEY_MAP.get(key)
+                if name:
+                    data[name] = float(val)  # float() ignores a trailing "\r"
+        except ValueError:
+            return None
+    else:
+        try:
+            for key, val in LINE_RE.findall(raw):
+                name = KEY_MAP.get(key.upper())
+                if name:
+                    data[name] = float(val)
+        except ValueError:
+            return None  # a bad value drops the line instead of logging junk
+    if len(data) < 5:
+        return None
+    return Reading(now_iso(), **data)
+
+def parse_line_fixed(raw: bytes):
+    """Fast path for lines in the exact firmware order (see the top of file).
+
+    PM25:X;PM10:X;CO2:X;TEMP:X;HUM:X is split once and the five numbers are
+    cut out by position, with no key lookups. Any other line falls back to
+    parse_line().
+    """
+    p = raw.split(b";")
+    if (len(p) == 5 and p[0].startswith(b"PM25:") and p[1].startswith(b"PM10:")
+            and p[2].startswith(b"CO2:") and p[3].startswith(b"TEMP:")
+            and p[4].startswith(b"HUM:")):
+        try:
+            return Reading(now_iso(), float(p[0][5:]), float(p[1][5:]),
+                           float(p[2][4:]), float(p[3][5:]), float(p[4][4:]))
+        except ValueError:
+            pass
+    return parse_line(raw)
+
+# Ranges for fake data: (Reading field, low, high, decimals), in field order.
+SIM_RANGES = (
+    ("pm25", 5,   80,   1),
+    ("pm10", 10,  120,  1),
+    ("co2",  400, 2000, 0),
+    ("temp", 0,   35,   1),
+    ("hum",  25,  75,   1),
+)
+
+# Filled in by _import_numpy() the first time a batch helper needs numpy.
+np = None
+THRESHOLD_LO = THRESHOLD_HI = None  # THRESHOLDS limits as float32 vectors
+SIM_LO = SIM_HI = None              # SIM_RANGES as float32 vectors
+RNG = None                          # numpy random generator for simulate_batch()
+
+def _import_numpy():
+    """Import numpy on first use (it is optional and slow to import).
+
+    Also builds the limits and ranges as vectors for the batch helpers.
+    """
+    global np, THRESHOLD_LO, THRESHOLD_HI, SIM_LO, SIM_HI, RNG
+    if np is None:
+        try:
+            import numpy  # optional; install with: pip install numpy
+        except Exception:
+            raise RuntimeError("numpy is required: pip install numpy") from None
+        THRESHOLD_LO = numpy.array([t[1] for t in THRESHOLDS], dtype=numpy.float32)
+        THRESHOLD_HI = numpy.array([t[2] for t in THRESHOLDS], dtype=numpy.float32)
+        SIM_LO = numpy.array([r[1] for r in SIM_RANGES], dtype=numpy.float32)
+        SIM_HI = numpy.array([r[2] for r in SIM_RANGES], dtype=numpy.float32)
+        RNG = numpy.random.default_rng()
+        np = numpy
+    return np
+
+def simulate_batch(n: int):
+    """Generate n readings at once as an (n, 5) numpy array.
+
+    Useful for simulating many virtual sensors (the "city network" idea).
+    Columns follow Reading field order: pm25, pm10, co2, temp, hum.
+    """
+    _import_numpy()
+    return RNG.uniform(SIM_LO, SIM_HI, size=(n, len(SIM_RANGES))).astype(np.float32)
+
+def simulate_reading() -> Reading:
+    """Generate a realistic random reading when no Arduino is connected.
+
+    One reading is quicker with `random` than with numpy, and random.seed()
+    still makes a demo repeatable; simulate_batch() is for many at once.
+    """
+    return Reading(now_iso(), *[
+        round(random.uniform(lo, hi), decimals)
+        for _, lo, hi, decimals in SIM_RANGES
+    ])
 
 def connect_serial():
     """Try to open serial connection to Arduino."""
-    if not serial or SIMULATION:
-        return None
+    if SIMULATION:
+        return None  # don't even load pyserial: faster start in SIMULATION mode
+    try:
+        import serial  # pyserial; install with: pip install pyserial
+    except Exception:
+        return None  # If not installed, we still can run in SIMULATION mode.
     try:
         ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
         time.sleep(2)  # Wait for board reset
@@ -132,73 +321,490 @@ def connect_serial():
         print(f"[Info] Could not open serial port {SERIAL_PORT}: {e}")
         return None
 
-def evaluate_thresholds(data: dict) -> list:
-    """Check if values exceed thresholds and return warnings."""
+def read_serial_lines(ser, buffer: bytearray) -> list:
+    """Drain the serial buffer in one read and return every complete line.
+
+    readline() asks the port for one byte at a time, which is slow (each
+    call is a system call). Here we read everything already waiting, keep
+    it in `buffer`, and split complete lines in Python. A half-received
+    line stays in `buffer` until the rest arrives.
+    """
+    n = ser.in_waiting
+    chunk = ser.read(n) if n else ser.read(1)  # read(1) waits up to timeout
+    buffer += chunk
+    if b"\n" not in buffer:
+        return []
+    *lines, rest = bytes(buffer).split(b"\n")  # lines as bytes, ready to parse
+    buffer[:] = rest
+    return lines
+
+def evaluate_thresholds(reading: Reading) -> list:
+    """Check if values exceed thresholds and return warnings.
+
+    Written out check by check: for a single reading this is quicker than
+    looping over THRESHOLDS. A missing value (NaN) is never "too high".
+    """
     warnings = []
-    if data["PM2_5"] > PM25_MAX:
-        warnings.append("Warning: PM2.5 exceeds guideline level.")
-    if data["PM10"] > PM10_MAX:
-        warnings.append("Warning: PM10 exceeds guideline level.")
-    if data["CO2"] > CO2_MAX:
-        warnings.append("Warning: CO₂ is high (ventilation recommended).")
-    if not (TEMP_MIN <= data["TEMP"] <= TEMP_MAX):
-        warnings.append("Warning: Temperature outside plausible range.")
-    if not (HUM_MIN <= data["HUM"] <= HUM_MAX):
-        warnings.append("Warning: Humidity outside comfort range.")
+    if reading.pm25 > PM25_MAX:
+        warnings.append(PM25_WARNING)
+    if reading.pm10 > PM10_MAX:
+        warnings.append(PM10_WARNING)
+    if reading.co2 > CO2_MAX:
+        warnings.append(CO2_WARNING)
+    if not (TEMP_MIN <= reading.temp <= TEMP_MAX):
+        warnings.append(TEMP_WARNING)
+    if not (HUM_MIN <= reading.hum <= HUM_MAX):
+        warnings.append(HUM_WARNING)
     return warnings
 
-def log_csv(path: str, row: dict) -> None:
-    """Append one row of data to CSV file."""
-    with open(path, "a", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow([
-            row["timestamp"], row["PM2_5"], row["PM10"],
-            row["CO2"], row["TEMP"], row["HUM"]
-        ])
+def evaluate_thresholds_batch(values):
+    """Check many readings at once with numpy.
+
+    `values` is an (N, 5) array with columns in Reading field order
+    (pm25, pm10, co2, temp, hum). Returns an (N, 5) boolean array that is
+    True where a value is outside its allowed range.
+    """
+    _import_numpy()
+    values = np.asarray(values, dtype=np.float32)
+    return (values < THRESHOLD_LO) | (values > THRESHOLD_HI)
+
+_tick_kernel = None  # compiled by simulate_tick() on first use; False → no numba
+
+def _compile_tick_kernel():
+    """Compile the many-sensor kernel with numba, or return False."""
+    try:
+        from numba import njit, prange  # optional; install with: pip install numba
+    except Exception:
+        return False
+
+    @njit(parallel=True)
+    def kernel(n, sim_lo, sim_hi, lo, hi):
+        """Generate and check n readings in one compiled, multi-core loop."""
+        values = np.empty((n, 5), np.float32)
+        violations = np.zeros((n, 5), np.bool_)
+        for i in prange(n):
+            for j in range(5):
+                values[i, j] = np.random.uniform(sim_lo[j], sim_hi[j])
+                violations[i, j] = values[i, j] < lo[j] or values[i, j] > hi[j]
+        return values, violations
+
+    return kernel
+
+def simulate_tick(n: int):
+    """Simulate one tick of n virtual sensors and check them all.
+
+    Returns (values, violations): two (n, 5) arrays like simulate_batch()
+    and evaluate_thresholds_batch(). With numba installed both steps run
+    in a single compiled loop spread over all CPU cores.
+    """
+    global _tick_kernel
+    _import_numpy()
+    if _tick_kernel is None:
+        _tick_kernel = _compile_tick_kernel()
+    if _tick_kernel is not False:
+        return _tick_kernel(n, SIM_LO, SIM_HI, THRESHOLD_LO, THRESHOLD_HI)
+    values = simulate_batch(n)
+    return values, evaluate_thresholds_batch(values)
+
+GZIP_MAGIC = b"\x1f\x8b\x08"  # every gzip member starts with these bytes
+
+def iter_gzip_members(path: str, chunk_size: int = 1 << 16):
+    """Yield the decompressed bytes of each gzip member in a .gz log.
+
+    CsvLogger writes one member per flush. A member cut short by a crash
+    (or damaged on disk) only gives back its complete lines, and reading
+    carries on with the next member instead of failing for the whole file.
+    """
+    with open(path, "rb") as f:
+        if f.seek(0, 2) == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos, size = 0, len(mm)
+            while pos < size:
+                d = zlib.decompressobj(wbits=31)  # 31 → expect a gzip header
+                parts = []
+                end = pos
+                try:
+                    while not d.eof and end < size:
+                        chunk = mm[end:end + chunk_size]
+                        end += len(chunk)
+                        parts.append(d.decompress(chunk))
+                    complete = d.eof
+                except zlib.error:
+                    complete = False
+                data = b"".join(parts)
+                if complete:
+                    yield data
+                    pos = end - len(d.unused_data)
+                    continue
+                yield data[:data.rfind(b"\n") + 1]  # drop the half-written row
+                pos = mm.find(GZIP_MAGIC, pos + 1)
+                if pos == -1:
+                    return
+
+def iter_csv_lines(path: str = CSV_LOG_PATH):
+    """Yield each line of a (possibly huge) CSV log as bytes, without "\r\n".
+
+    The file is memory-mapped: the operating system pages it in as we go,
+    so even a year of readings is never copied into memory all at once.
+    A compressed (.gz) log is decompressed one gzip member at a time.
+    """
+    if path.endswith(".gz"):
+        for data in iter_gzip_members(path):
+            for line in data.splitlines():
+                yield line
+        return
+    with open(path, "rb") as f:
+        if f.seek(0, 2) == 0:
+            return  # mmap cannot map an empty file
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            while (nl := mm.find(b"\n", start)) != -1:
+                end = nl - 1 if nl > start and mm[nl - 1] == 0x0D else nl  # csv writes \r\n
+                yield mm[start:end]
+                start = nl + 1
+            if start < len(mm):
+                yield mm[start:]
+
+def load_csv(path: str = CSV_LOG_PATH):
+    """Load the measurement columns of a CSV log as an (N, 5) float32 array.
+
+    With pyarrow installed the file is memory-mapped and parsed by
+    pyarrow's fast multi-threaded CSV reader; otherwise numpy is used.
+    A .gz log is read through iter_csv_lines(), which survives a crash.
+    """
+    _import_numpy()
+    if path.endswith(".gz"):
+        lines = (line.decode("ascii") for line in iter_csv_lines(path))
+        return np.loadtxt(lines, delimiter=",", skiprows=1, usecols=(1, 2, 3, 4, 5),
+                          dtype=np.float32, ndmin=2)
+    try:
+        import pyarrow as pa  # optional, and slow to import: only load it here
+        import pyarrow.csv as pacsv
+    except Exception:
+        pacsv = None
+    if pacsv is not None:
+        columns = CSV_HEADER[1:]
+        with pa.memory_map(path, "r") as src:  # closed again: no lock on the log
+            table = pacsv.read_csv(
+                src,
+                convert_options=pacsv.ConvertOptions(
+                    include_columns=columns,
+                    column_types={name: pa.float32() for name in columns},
+                ),
+            )
+        return np.column_stack([table.column(name).to_numpy() for name in columns])
+    return np.loadtxt(path, delimiter=",", skiprows=1, usecols=(1, 2, 3, 4, 5),
+                      dtype=np.float32, ndmin=2)
+
+def analyze(path: str = CSV_LOG_PATH) -> dict:
+    """Re-check a whole CSV log against the thresholds in one go.
+
+    Returns how many readings there are and, per value, how many were
+    outside the allowed range, e.g. {"rows": 3600, "pm25": 812, ...}.
+    """
+    violations = evaluate_thresholds_batch(load_csv(path))
+    summary = {"rows": len(violations)}
+    for (field, _, _, _), count in zip(THRESHOLDS, violations.sum(axis=0)):
+        summary[field] = int(count)
+    return summary
+
+class CsvLogger:
+    """Append rows to the CSV file, keeping it open while the script runs.
+
+    Opening and closing the file for every reading is slow. Instead we open
+    it once, collect rows as bytes in memory, and write them to disk every
+    CSV_FLUSH_EVERY rows (and when the logger is closed). The columns never
+    change, so each row is formatted directly rather than through the csv
+    module; the file looks exactly the same. See write_log_block() for .gz.
+    """
+
+    def __init__(self, path: str, flush_every: int = CSV_FLUSH_EVERY,
+                 fsync_every: int = CSV_FSYNC_EVERY):
+        self.compress = path.endswith(".gz")
+        self.fd = open_log_fd(path)
+        self.buffer = bytearray()
+        self.flush_every = flush_every
+        self.fsync_every = fsync_every
+        self.pending = 0
+        self.unsynced = 0
+
+    def log(self, reading: Reading) -> None:
+        """Append one reading to the CSV file."""
+        ts, pm25, pm10, co2, temp, hum = reading
+        self.buffer += f"{ts},{pm25},{pm10},{co2},{temp},{hum}\r\n".encode("ascii")
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.buffer:
+            write_log_block(self.fd, self.buffer, self.compress)
+            self.unsynced += self.pending
+            if self.unsynced >= self.fsync_every:
+                os.fsync(self.fd)  # make sure it survives a power cut
+                self.unsynced = 0
+            self.buffer.clear()
+        self.pending = 0
+
+    def close(self) -> None:
+        self.flush()
+        os.fsync(self.fd)
+        os.close(self.fd)
+
+def _import_parquet():
+    """Import pyarrow on first use: it is optional and slow to import."""
+    try:
+        import pyarrow as pa  # optional; install with: pip install pyarrow
+        import pyarrow.parquet as pq
+    except Exception:
+        raise RuntimeError("pyarrow is required: pip install pyarrow") from None
+    return pa, pq
+
+class ParquetLogger:
+    """Save readings to a Parquet file (binary, column by column).
+
+    Parquet stores numbers as binary float32 instead of text, so files are
+    smaller and analysis tools load them without re-parsing every value.
+    Rows are collected in lists and written PARQUET_BATCH at a time.
+    A Parquet file cannot be appended to, so each run gets its own file.
+    """
+
+    COLUMNS = tuple(CSV_HEADER[1:])  # same column names as the CSV log
+
+    def __init__(self, path: str, batch: int = PARQUET_BATCH):
+        pa, pq = _import_parquet()
+        self.pa = pa
+        self.schema = pa.schema(
+            [("timestamp", pa.timestamp("s"))]
+            + [(name, pa.float32()) for name in self.COLUMNS]
+        )
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.batch = batch
+        self.columns = {name: [] for name in self.schema.names}
+
+    def log(self, reading: Reading) -> None:
+        """Add one reading; write a chunk to disk once the batch is full."""
+        self.columns["timestamp"].append(datetime.fromisoformat(reading.timestamp))
+        for name, value in zip(self.COLUMNS, reading[1:]):
+            self.columns[name].append(value)
+        if len(self.columns["timestamp"]) >= self.batch:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.columns["timestamp"]:
+            return
+        table = self.pa.Table.from_pydict(self.columns, schema=self.schema)
+        self.writer.write_table(table)
+        for values in self.columns.values():
+            values.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self.writer.close()
+
+def parquet_path() -> str:
+    """Parquet file name for this run, e.g. air_quality_log_20250101T120000.parquet."""
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    return CSV_PATH.rsplit(".", 1)[0] + f"_{stamp}.parquet"
+
+def load_parquet(path: str):
+    """Open a Parquet log through a memory map and return a pyarrow Table.
+
+    The file is mapped into memory instead of read into a copy, so the
+    operating system only loads the parts that are actually used.
+    """
+    pa, pq = _import_parquet()
+    with pa.memory_map(path, "r") as src:  # closed again: no lock on the file
+        return pq.read_table(src)
+
+class TSDBSink:
+    """Send readings to InfluxDB or TimescaleDB in batches.
+
+    Databases are much faster with one write of many rows than with one
+    write per row, so readings are collected and sent together when
+    TSDB_BATCH rows are waiting or TSDB_FLUSH_SEC seconds have passed.
+    If the database cannot be reached, the rows are kept (at most
+    TSDB_MAX_BACKLOG, oldest dropped first) and sent again every
+    TSDB_FLUSH_SEC seconds, so a network hiccup doesn't stop the monitor.
+
+    For TimescaleDB, create the table first:
+      CREATE TABLE air_quality (time TIMESTAMPTZ, pm2_5 REAL, pm10 REAL,
+                                co2 REAL, temp REAL, hum REAL);
+    """
+
+    COPY_MIN_ROWS = 1000  # bigger batches use COPY instead of INSERT
+
+    def __init__(self, backend: str, batch: int = TSDB_BATCH,
+                 flush_sec: float = TSDB_FLUSH_SEC,
+                 max_backlog: int = TSDB_MAX_BACKLOG):
+        self.backend = backend
+        self.batch = batch
+        self.flush_sec = flush_sec
+        self.rows = deque(maxlen=max_backlog)
+        self.last_flush = time.monotonic()
+        self.failing = False  # last write failed → only retry on the timer
+        if backend == "influx":
+            from influxdb_client import InfluxDBClient, Point
+            from influxdb_client.client.write_api import SYNCHRONOUS
+            self.Point = Point
+            self.client = InfluxDBClient(url=INFLUX_URL, token=INFLUX_TOKEN,
+                                         org=INFLUX_ORG)
+            self.write_api = self.client.write_api(write_options=SYNCHRONOUS)
+        elif backend == "timescale":
+            import psycopg
+            self.psycopg = psycopg
+            self.client = psycopg.connect(TIMESCALE_DSN)
+        else:
+            raise ValueError(f"Unknown TSDB_BACKEND: {backend!r}")
+
+    def log(self, reading: Reading) -> None:
+        """Queue one reading; send the batch if it is full or old enough."""
+        # Timezone-aware local time: a naive datetime would be stored as UTC.
+        ts = datetime.fromisoformat(reading.timestamp).astimezone()
+        self.rows.append((ts, *reading[1:]))
+        if len(self.rows) >= self.batch and not self.failing:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self) -> None:
+        """Send waiting rows (or retry failed ones) once TSDB_FLUSH_SEC has passed.
+
+        Called from every tick of the main loop too, so rows still go out
+        while the sensor is quiet.
+        """
+        if time.monotonic() - self.last_flush >= self.flush_sec:
+            self.flush()
+
+    def flush(self) -> None:
+        """Send all waiting rows; on failure keep them for the next try."""
+        self.last_flush = time.monotonic()
+        if not self.rows:
+            return
+        rows = list(self.rows)
+        try:
+            self.write(rows)
+        except Exception as e:
+            print(f"[Info] Could not write to {self.backend} "
+                  f"({len(rows)} rows kept for retry): {e}")
+            self.failing = True
+            return
+        self.rows.clear()
+        self.failing = False
+
+    def write(self, rows: list) -> None:
+        if self.backend == "influx":
+            points = [
+                self.Point("air").time(ts)
+                .field("PM2_5", pm25).field("PM10", pm10).field("CO2", co2)
+                .field("TEMP", temp).field("HUM", hum)
+                for ts, pm25, pm10, co2, temp, hum in rows
+            ]
+            self.write_api.write(bucket=INFLUX_BUCKET, record=points)
+            return
+        if self.client.closed:
+            self.client = self.psycopg.connect(TIMESCALE_DSN)  # reconnect
+        try:
+            with self.client.cursor() as cur:
+                if len(rows) >= self.COPY_MIN_ROWS:
+                    with cur.copy("COPY air_quality FROM STDIN") as copy:
+                        for r in rows:
+                            copy.write_row(r)
+                else:
+                    cur.executemany(
+                        "INSERT INTO air_quality VALUES (%s, %s, %s, %s, %s, %s)",
+                        rows,
+                    )
+            self.client.commit()
+        except Exception:
+            if not self.client.closed:
+                self.client.rollback()  # leave the connection usable
+            raise
+
+    def close(self) -> None:
+        self.flush()
+        self.client.close()
 
 # ----------------------------- MAIN -----------------------------------
 def main():
     print("\nAir Quality Monitoring Framework (Helena)")
     print("Running as a framework with SIMULATION fallback.\n")
-    ensure_csv_header(CSV_PATH)
+    # Output goes to a file or pipe: show each reading as soon as it is
+    # written, instead of waiting for a big block to fill up. (Skipped when
+    # stdout is missing, e.g. pythonw, or is not a real console stream.)
+    reconfigure = getattr(sys.stdout, "reconfigure", None)
+    if reconfigure is not None and not sys.stdout.isatty():
+        reconfigure(line_buffering=True)
+    ensure_csv_header(CSV_LOG_PATH)
+    loggers = [CsvLogger(CSV_LOG_PATH)]
+    if PARQUET_LOG:
+        try:
+            loggers.append(ParquetLogger(parquet_path()))
+        except RuntimeError:
+            print("[Info] pyarrow not installed; skipping the Parquet log.")
+    tsdb = None
+    if TSDB_BACKEND:
+        try:
+            tsdb = TSDBSink(TSDB_BACKEND)
+            loggers.append(tsdb)
+        except Exception as e:
+            print(f"[Info] Could not connect to {TSDB_BACKEND}: {e}")
 
     ser = connect_serial()
     print("Mode:", "SERIAL" if ser else "SIMULATION")
 
+    serial_buffer = bytearray()  # keeps partial lines between reads
+    next_tick = time.monotonic()
+
     try:
         while True:
             if ser:
-                raw = ser.readline().decode(errors="ignore").strip()
-                data = parse_line(raw) if raw else {}
+                readings = []
+                for line in read_serial_lines(ser, serial_buffer):
+                    readings.append(parse_line_fixed(line))
             else:
-                data = simulate_reading()
+                readings = [simulate_reading()]
 
-            if data:
-                ts = datetime.now().isoformat(timespec="seconds")
-                row = {
-                    "timestamp": ts,
-                    "PM2_5": data["PM2_5"],
-                    "PM10":  data["PM10"],
-                    "CO2":   data["CO2"],
-                    "TEMP":  data["TEMP"],
-                    "HUM":   data["HUM"],
-                }
+            for reading in readings:
+                if reading is None:
+                    continue
 
-                print("\n------------------------------")
-                print(ts)
-                print(f"PM2.5: {row['PM2_5']} μg/m³ | PM10: {row['PM10']} μg/m³")
-                print(f"CO₂: {row['CO2']} ppm | Temp: {row['TEMP']} °C | Hum: {row['HUM']} %")
+                warnings = evaluate_thresholds(reading)
+                if VERBOSE:
+                    report = [
+                        "\n------------------------------",
+                        reading.timestamp,
+                        f"PM2.5: {reading.pm25} μg/m³ | PM10: {reading.pm10} μg/m³",
+                        f"CO₂: {reading.co2} ppm | Temp: {reading.temp} °C | Hum: {reading.hum} %",
+                    ]
+                    report.extend(warnings)
+                    sys.stdout.write("\n".join(report) + "\n")  # one write per reading
+                elif warnings:
+                    # Quiet mode still reports pollution, with the time it happened.
+                    report = [f"{reading.timestamp} {msg}" for msg in warnings]
+                    sys.stdout.write("\n".join(report) + "\n")
 
-                for msg in evaluate_thresholds(row):
-                    print(msg)
+                for logger in loggers:
+                    logger.log(reading)
 
-                log_csv(CSV_PATH, row)
+            if tsdb:
+                tsdb.flush_if_due()  # even when no reading arrived this tick
 
-            time.sleep(READ_INTERVAL_SEC)
+            # Sleep until the next planned tick, not a fixed time, so the time
+            # spent reading and logging does not slowly shift the schedule.
+            next_tick += READ_INTERVAL_SEC
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()  # running late: skip, don't rush
 
     except KeyboardInterrupt:
         print("\nStopped by user (Ctrl+C). Goodbye!")
     finally:
+        for logger in loggers:
+            logger.close()
         if ser:
             try:
                 ser.close()